@@ -0,0 +1,41 @@
+import io
+
+import pyarrow.csv as pacsv
+
+
+class RecordsStream(io.RawIOBase):
+    """Read-only file object over record chunks put on a queue; None ends the stream."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.pending = memoryview(b'')
+        self.finished = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            if self.finished:
+                return 0
+            chunk = self.chunks.get()
+            if chunk is None:
+                self.finished = True
+                return 0
+            self.pending = memoryview(chunk)
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def read_csv_records(stream, schema):
+    """Parse headerless CSV records into a table; empty input gives an empty table."""
+    reader = io.BufferedReader(stream)
+    if not reader.peek(1):
+        return schema.empty_table()
+    return pacsv.read_csv(
+        reader,
+        read_options=pacsv.ReadOptions(column_names=schema.names),
+        convert_options=pacsv.ConvertOptions(column_types=schema)
+    )
@@ -1,10 +1,25 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 import boto3
+import botocore.config
+import botocore.exceptions
+import aiobotocore.session
+from aiobotocore.config import AioConfig
+import asyncio
 import io
+import queue
 import yaml
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import altair as alt
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pads
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from csv_records import RecordsStream, read_csv_records
 
 # AWS S3 Config from Streamlit secrets
 aws_access_key_id = st.secrets["AWS_ACCESS_KEY_ID"]
@@ -13,46 +28,168 @@ region_name = st.secrets["region_name"]
 bucket_name = st.secrets["bucket_name"]
 combine_results_prefix = st.secrets["combine_results_prefix"]
 yaml_config_key = st.secrets["yaml_config_key"]
+# Daily result files: <combine_results_prefix>/aggregated_results_YYYYMMDD.csv
+result_csv_prefix = combine_results_prefix.rstrip('/') + '/aggregated_results_'
 # Hardcoded plot prefix for stored plots (PNG images)
 plot_prefix = "combine_results_graph/"
+# Parquet dataset of the daily results (results/date=YYYYMMDD/), used once _SUCCESS exists
+results_dataset_prefix = "results/"
+results_dataset_marker = f"{results_dataset_prefix}_SUCCESS"
+# Precomputed summary and per-symbol results (per_symbol/<symbol>.parquet)
+summary_key = "summary.parquet"
+per_symbol_prefix = "per_symbol/"
+# Columns of the daily result CSVs used by the dashboard
+result_schema = pa.schema([
+    ('Symbol', pa.dictionary(pa.int32(), pa.string())),
+    ('Net_PnL', pa.float64()),
+    ('Max_PnL', pa.float64()),
+    ('Drawdown', pa.float64())
+])
+# Type of the Date column on every load path
+result_date_type = pa.timestamp('ns')
+result_columns = result_schema.names
+# Number of concurrent S3 requests when loading the daily result CSVs
+max_download_workers = 32
+# HTTP connections kept open by the shared S3 client
+max_pool_connections = 64
+# Seconds before cached S3 listings and downloads are refreshed
+cache_ttl = 600
+# Result CSVs are listed from scratch every this many refreshes
+full_listing_interval = 6
+# Seconds before cached plot listings and images are refreshed
+plot_cache_ttl = 3600
+# Rows per page of the results table
+results_page_size = 1000
 
 
 # --- S3 Helper Functions ---
+@st.cache_resource
 def get_s3_client():
     return boto3.client(
         's3',
         region_name=region_name,
         aws_access_key_id=aws_access_key_id,
-        aws_secret_access_key=aws_secret_access_key
+        aws_secret_access_key=aws_secret_access_key,
+        config=botocore.config.Config(
+            max_pool_connections=max_pool_connections,
+            retries={'mode': 'adaptive'}
+        )
     )
 
 
+@st.cache_resource
+def get_s3_filesystem():
+    return pafs.S3FileSystem(
+        access_key=aws_access_key_id,
+        secret_key=aws_secret_access_key,
+        region=region_name
+    )
+
+
+# Result keys seen by earlier listings, shared across sessions
+@st.cache_resource
+def get_known_result_keys():
+    return {'keys': (), 'listings': 0}
+
+
+def forget_known_result_keys():
+    known_result_keys = get_known_result_keys()
+    known_result_keys['keys'] = ()
+    known_result_keys['listings'] = 0
+    list_combined_csvs.clear()
+
+
+@st.cache_data(ttl=cache_ttl, show_spinner=False)
 def list_combined_csvs():
+    known_result_keys = get_known_result_keys()
+    if known_result_keys['listings'] % full_listing_interval == 0:
+        known_keys = ()
+    else:
+        known_keys = known_result_keys['keys']
     client = get_s3_client()
     paginator = client.get_paginator('list_objects_v2')
-    pages = paginator.paginate(Bucket=bucket_name, Prefix=combine_results_prefix)
-    all_keys = []
+    pages = paginator.paginate(
+        Bucket=bucket_name,
+        Prefix=result_csv_prefix,
+        StartAfter=known_keys[-1] if known_keys else '',
+        PaginationConfig={'PageSize': 1000}
+    )
+    new_keys = []
     for page in pages:
         contents = page.get('Contents', [])
-        all_keys.extend([
-            item['Key'] for item in contents
-            if item['Key'].endswith('.csv') and 'aggregated_results' in item['Key']
-        ])
-    return sorted(all_keys)
+        new_keys.extend([item['Key'] for item in contents if item['Key'].endswith('.csv')])
+    known_result_keys['keys'] = known_keys + tuple(sorted(new_keys))
+    known_result_keys['listings'] += 1
+    return list(known_result_keys['keys'])
 
 
-def read_csv_from_s3(key):
-    client = get_s3_client()
-    response = client.get_object(Bucket=bucket_name, Key=key)
-    return pd.read_csv(io.BytesIO(response['Body'].read()))
+async def read_csv_from_s3(client, key, parse_executor):
+    # Fetch only the needed columns via S3 Select
+    columns = ', '.join(f's."{column}"' for column in result_columns)
+    response = await client.select_object_content(
+        Bucket=bucket_name,
+        Key=key,
+        ExpressionType='SQL',
+        Expression=f'SELECT {columns} FROM S3Object s',
+        InputSerialization={'CSV': {'FileHeaderInfo': 'USE'}},
+        OutputSerialization={'CSV': {}}
+    )
+    # Parse the records on a worker thread as they arrive
+    records = queue.Queue()
+    parsing = asyncio.get_running_loop().run_in_executor(
+        parse_executor, read_csv_records, RecordsStream(records), result_schema
+    )
+    try:
+        async for event in response['Payload']:
+            if 'Records' in event:
+                records.put(event['Records']['Payload'])
+    except BaseException:
+        records.put(None)
+        parsing.cancel()
+        raise
+    records.put(None)
+    return await parsing
+
+
+async def read_csvs_from_s3(keys):
+    session = aiobotocore.session.get_session()
+    async with session.create_client(
+        's3',
+        region_name=region_name,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        config=AioConfig(
+            max_pool_connections=max_download_workers,
+            retries={'mode': 'adaptive'}
+        )
+    ) as client:
+        with ThreadPoolExecutor(max_workers=max_download_workers) as parse_executor:
+            # One parser thread per file in flight
+            in_flight = asyncio.Semaphore(max_download_workers)
+
+            async def read_csv(key):
+                async with in_flight:
+                    return await read_csv_from_s3(client, key, parse_executor)
+
+            tasks = [asyncio.create_task(read_csv(key)) for key in keys]
+            try:
+                return await asyncio.gather(*tasks)
+            except BaseException:
+                # Stop the remaining downloads before the client is closed
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
 
 
+@st.cache_data(ttl=cache_ttl, show_spinner=False)
 def read_yaml_from_s3(key):
     client = get_s3_client()
     response = client.get_object(Bucket=bucket_name, Key=key)
     return yaml.safe_load(response['Body'].read().decode('utf-8'))
 
 
+@st.cache_data(ttl=plot_cache_ttl, show_spinner=False)
 def list_plot_keys():
     client = get_s3_client()
     paginator = client.get_paginator('list_objects_v2')
@@ -64,6 +201,134 @@ def list_plot_keys():
     return sorted(keys)
 
 
+@st.cache_data(ttl=plot_cache_ttl, show_spinner=False)
+def plot_index() -> pd.DataFrame:
+    # Parse each plot filename (assumed format: <stock>_<date>_plot.png)
+    plot_df = pd.DataFrame({'key': list_plot_keys()}, dtype=object)
+    basenames = plot_df['key'].str.rsplit('/', n=1).str[-1]
+    plot_df[['symbol', 'date']] = basenames.str.extract(r'^([^_]+)_([^_]+)_')
+    return plot_df.dropna(subset=['symbol', 'date']).reset_index(drop=True)
+
+
+@st.cache_data(ttl=plot_cache_ttl, show_spinner=False)
+def plot_options() -> tuple[list[str], list[str]]:
+    plot_df = plot_index()
+    return sorted(plot_df['symbol'].unique()), sorted(plot_df['date'].unique())
+
+
+@st.cache_data(ttl=plot_cache_ttl, max_entries=32, show_spinner=False)
+def plot_bytes(key) -> bytes:
+    client = get_s3_client()
+    response = client.get_object(Bucket=bucket_name, Key=key)
+    return response['Body'].read()
+
+
+def results_table_to_frame(table: pa.Table) -> pd.DataFrame:
+    result_df = table.to_pandas(split_blocks=True, self_destruct=True)
+    # Sort the symbols, which otherwise keep first-seen order
+    result_df['Symbol'] = result_df['Symbol'].cat.set_categories(
+        sorted(result_df['Symbol'].cat.categories)
+    )
+    return result_df
+
+
+@st.cache_data(ttl=cache_ttl, show_spinner="Loading precomputed results...")
+def load_all_results(result_keys: tuple[str, ...]) -> pd.DataFrame:
+    # Read all daily result CSVs concurrently, in key order
+    tables = asyncio.run(read_csvs_from_s3(result_keys))
+    # Extract date from filename: aggregated_results_YYYYMMDD.csv
+    file_dates = pd.to_datetime([
+        key.split('/')[-1].replace('aggregated_results_', '').replace('.csv', '')
+        for key in result_keys
+    ], format='%Y%m%d')
+    dates = pa.array(
+        np.repeat(file_dates.values, [table.num_rows for table in tables]),
+        type=result_date_type
+    )
+    combined = pa.concat_tables(tables).append_column('Date', dates)
+    # Let to_pandas free the per-file buffers as it converts
+    del tables
+    return results_table_to_frame(combined)
+
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def summarize_results(result_df: pd.DataFrame) -> pd.DataFrame:
+    return result_df.groupby('Symbol', observed=True).agg(**{
+        'Total Net PnL': ('Net_PnL', 'sum'),
+        'Max Net PnL': ('Max_PnL', 'max'),
+        'Max Drawdown': ('Drawdown', 'max')
+    }).reset_index()
+
+
+# Shared, not copied, across reruns: callers must not modify the frames
+@st.cache_resource(max_entries=1, show_spinner=False)
+def split_by_symbol(result_df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    return {
+        symbol: group.sort_values('Date')
+        for symbol, group in result_df.groupby('Symbol', observed=True, sort=False)
+    }
+
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    # Dates keep the YYYYMMDD form of the daily file names
+    df.to_csv(buffer, index=False, encoding='utf-8', date_format='%Y%m%d')
+    return buffer.getvalue()
+
+
+@st.cache_data(ttl=cache_ttl, show_spinner=False)
+def s3_prefix_exists(prefix):
+    client = get_s3_client()
+    response = client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, MaxKeys=1)
+    return response.get('KeyCount', 0) > 0
+
+
+@st.cache_data(ttl=cache_ttl, show_spinner=False)
+def s3_key_exists(key):
+    client = get_s3_client()
+    try:
+        client.head_object(Bucket=bucket_name, Key=key)
+    except botocore.exceptions.ClientError as error:
+        if error.response['Error']['Code'] in ('404', 'NoSuchKey'):
+            return False
+        raise
+    return True
+
+
+@st.cache_data(ttl=cache_ttl, show_spinner="Loading precomputed results...")
+def load_results_dataset() -> pd.DataFrame:
+    # Keep partition dates as YYYYMMDD strings rather than inferred integers
+    partitioning = pads.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+    dataset = pads.dataset(
+        f"{bucket_name}/{results_dataset_prefix}",
+        filesystem=get_s3_filesystem(),
+        format='parquet',
+        partitioning=partitioning
+    )
+    table = dataset.to_table(columns=result_columns + ['date'])
+    dates = pc.strptime(table.column('date'), format='%Y%m%d', unit=result_date_type.unit)
+    table = table.drop_columns('date').cast(result_schema).append_column('Date', dates)
+    return results_table_to_frame(table)
+
+
+@st.cache_data(ttl=cache_ttl, show_spinner=False)
+def read_summary_from_s3() -> pd.DataFrame:
+    return pq.read_table(f"{bucket_name}/{summary_key}", filesystem=get_s3_filesystem()).to_pandas()
+
+
+@st.cache_data(ttl=cache_ttl, show_spinner=False)
+def read_symbol_results_from_s3(symbol) -> pd.DataFrame:
+    table = pq.read_table(
+        f"{bucket_name}/{per_symbol_prefix}{symbol}.parquet",
+        columns=result_columns + ['Date'],
+        filesystem=get_s3_filesystem()
+    )
+    # Match the dtypes of result_df whatever types the pipeline wrote
+    table = table.cast(result_schema.append(pa.field('Date', result_date_type)))
+    return results_table_to_frame(table).sort_values('Date')
+
+
 # --- Streamlit App ---
 st.set_page_config(layout="wide")
 st.title("📈 Market Making Results Dashboard")
@@ -73,40 +338,53 @@ yaml_config = read_yaml_from_s3(yaml_config_key)
 config_stocks = yaml_config.get("stocks", {})
 valid_symbols = set(config_stocks.keys())
 
-# List pre-computed backtest result CSV files
-result_keys = list_combined_csvs()
-if not result_keys:
-    st.error("No combined result CSV files found in S3 bucket.")
-    st.stop()
+# List the stored plots in the background while the results load
+listing_executor = ThreadPoolExecutor(
+    max_workers=1,
+    initializer=add_script_run_ctx,
+    initargs=(None, get_script_run_ctx())
+)
+plot_index_future = listing_executor.submit(plot_index)
+listing_executor.shutdown(wait=False)
 
-# Read all daily result CSVs and concatenate them
-daily_results = []
-progress_bar = st.progress(0, text="Loading precomputed results...")
-
-for i, key in enumerate(result_keys):
-    df = read_csv_from_s3(key)
-    # Extract date from filename: aggregated_results_YYYYMMDD.csv
-    file_date = key.split('/')[-1].replace('aggregated_results_', '').replace('.csv', '')
-    df['Date'] = file_date
-    daily_results.append(df)
-    progress_bar.progress((i + 1) / len(result_keys), text=f"Loaded: {key.split('/')[-1]}")
+if s3_key_exists(results_dataset_marker):
+    result_df = load_results_dataset()
+else:
+    # List pre-computed backtest result CSV files
+    result_keys = list_combined_csvs()
+    if not result_keys:
+        st.error("No combined result CSV files found in S3 bucket.")
+        st.stop()
 
-result_df = pd.concat(daily_results, ignore_index=True)
+    try:
+        result_df = load_all_results(tuple(result_keys))
+    except botocore.exceptions.ClientError as error:
+        if error.response['Error']['Code'] != 'NoSuchKey':
+            raise
+        # A listed daily file was deleted; list from scratch
+        forget_known_result_keys()
+        st.rerun()
 
 col1, col2 = st.columns(2)
 with col1:
-    st.subheader("📊 Backtest Results (All Days)")
-    st.dataframe(result_df)
-
-summary_df = result_df.groupby('Symbol').agg({
-    'Net_PnL': 'sum',
-    'Max_PnL': 'max',
-    'Drawdown': 'max'
-}).rename(columns={
-    'Net_PnL': 'Total Net PnL',
-    'Max_PnL': 'Max Net PnL',
-    'Drawdown': 'Max Drawdown'
-}).reset_index()
+    st.subheader("📊 Backtest Results (All Days, PnL Columns)")
+    # Show one page at a time; the download has the full data
+    page_count = max(1, -(-len(result_df) // results_page_size))
+    page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+    page_start = (page - 1) * results_page_size
+    st.dataframe(
+        result_df.iloc[page_start:page_start + results_page_size],
+        column_config={'Date': st.column_config.DateColumn(format='YYYYMMDD')}
+    )
+    st.caption(f"Page {page} of {page_count} ({len(result_df)} rows)")
+
+# Prefer precomputed aggregates when published
+has_precomputed_summary = s3_key_exists(summary_key)
+has_precomputed_symbols = s3_prefix_exists(per_symbol_prefix)
+if has_precomputed_summary:
+    summary_df = read_summary_from_s3()
+else:
+    summary_df = summarize_results(result_df)
 
 with col2:
     st.subheader("📋 Combined Summary")
@@ -115,12 +393,19 @@ with col2:
 col3, col4 = st.columns(2)
 with col3:
     st.subheader("📈 Net PnL Over Time for Selected Symbol")
-    symbol_options = summary_df['Symbol'].unique().tolist()
+    symbol_options = result_df['Symbol'].cat.categories.tolist()
     selected_symbol = st.selectbox("Select Symbol", symbol_options)
 
-    symbol_df = result_df[result_df['Symbol'] == selected_symbol].copy()
-    symbol_df['Date'] = pd.to_datetime(symbol_df['Date'], format='%Y%m%d').dt.date
-    symbol_df = symbol_df.sort_values('Date')
+    symbol_df = None
+    if has_precomputed_symbols and selected_symbol is not None:
+        try:
+            symbol_df = read_symbol_results_from_s3(selected_symbol)
+        except FileNotFoundError:
+            # Not every symbol has been published yet
+            pass
+    if symbol_df is None:
+        # No symbol is selectable when there are no result rows
+        symbol_df = split_by_symbol(result_df).get(selected_symbol, result_df.iloc[:0])
 
     line_chart = alt.Chart(symbol_df).mark_line(point=True).encode(
         x=alt.X('Date:T', title='Date'),
@@ -136,31 +421,19 @@ with col3:
 
 with col4:
     st.markdown("### 📥 Download Results")
-    csv_bytes = result_df.to_csv(index=False).encode('utf-8')
-    st.download_button("Download Full Results CSV", data=csv_bytes,
-                       file_name=f"all_results_{datetime.now().strftime('%Y%m%d')}.csv")
+    csv_bytes = to_csv_bytes(result_df)
+    st.download_button("Download PnL Results CSV", data=csv_bytes,
+                       file_name=f"pnl_results_{datetime.now().strftime('%Y%m%d')}.csv")
 
 # --- Display Stored Plot Images ---
 st.markdown("## 📷 View Stored Plots")
 
-plot_keys = list_plot_keys()
-if not plot_keys:
+plot_df = plot_index_future.result()
+if plot_df.empty:
     st.write("No plot images found in S3 bucket.")
 else:
-    # Parse each plot filename (assumed format: <stock>_<date>_plot.png)
-    data = []
-    for key in plot_keys:
-        basename = key.split('/')[-1]  # e.g., "BEL_20250407_plot.png"
-        parts = basename.split('_')
-        if len(parts) >= 3:
-            symbol = parts[0]
-            date_str = parts[1]
-            data.append({'key': key, 'symbol': symbol, 'date': date_str})
-    plot_df = pd.DataFrame(data)
-
     # Create dropdown selectors for stock and date
-    stock_options = sorted(plot_df['symbol'].unique())
-    date_options = sorted(plot_df['date'].unique())
+    stock_options, date_options = plot_options()
     selected_stock_plot = st.selectbox("Select Stock for Plot", stock_options)
     selected_date_plot = st.selectbox("Select Date for Plot", date_options)
 
@@ -169,9 +442,6 @@ else:
                             (plot_df['date'] == selected_date_plot)]
     if not filtered_plot.empty:
         selected_key = filtered_plot.iloc[0]['key']
-        client = get_s3_client()
-        response = client.get_object(Bucket=bucket_name, Key=selected_key)
-        img_bytes = response['Body'].read()
-        st.image(img_bytes, caption=f"{selected_stock_plot} Plot for {selected_date_plot}")
+        st.image(plot_bytes(selected_key), caption=f"{selected_stock_plot} Plot for {selected_date_plot}")
     else:
         st.write("No plot found for selected stock and date.")
@@ -0,0 +1,47 @@
+import queue
+import threading
+
+import pyarrow as pa
+
+from csv_records import RecordsStream, read_csv_records
+
+schema = pa.schema([
+    ('Symbol', pa.dictionary(pa.int32(), pa.string())),
+    ('Net_PnL', pa.float32())
+])
+
+
+def records_stream(*chunks):
+    records = queue.Queue()
+    for chunk in chunks + (None,):
+        records.put(chunk)
+    return RecordsStream(records)
+
+
+def test_read_csv_records():
+    table = read_csv_records(records_stream(b'BEL,1.', b'', b'5\nTCS,-2\n'), schema)
+    assert table.schema == schema
+    assert table.column('Symbol').to_pylist() == ['BEL', 'TCS']
+    assert table.column('Net_PnL').to_pylist() == [1.5, -2.0]
+
+
+def test_read_csv_records_empty():
+    table = read_csv_records(records_stream(), schema)
+    assert table.schema == schema
+    assert table.num_rows == 0
+
+
+def test_records_stream_waits_for_chunks():
+    records = queue.Queue()
+    stream = RecordsStream(records)
+
+    def produce():
+        for chunk in (b'BEL,', b'3\n', None):
+            records.put(chunk)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    table = read_csv_records(stream, schema)
+    producer.join()
+    assert table.column('Net_PnL').to_pylist() == [3.0]
+    assert stream.read() == b''